@@ -16,6 +16,8 @@ import re
 
 from catkin_pkg.package import parse_package_string
 
+tag_remover = re.compile('<.*?>')
+
 
 class PackageMetadata:
     def __init__(self, pkg_xml):
@@ -49,7 +51,6 @@ class PackageMetadata:
         self.member_of_groups = [
             group.name for group in pkg.member_of_groups
         ]
-        tag_remover = re.compile('<.*?>')
         build_type = [
             re.sub(tag_remover, '', str(e))
             for e in pkg.exports if 'build_type' in str(e)
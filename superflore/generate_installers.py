@@ -56,6 +56,10 @@ def generate_installers(
             current, current_info, installer_name = gen_pkg_func(
                 overlay, pkg, distro, preserve_existing, *args
             )
+            if current and not installer_name:
+                # the installer is already up to date
+                succeeded += 1
+                continue
             if not current:
                 if current_info:
                     # we are missing dependencies
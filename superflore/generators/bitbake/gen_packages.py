@@ -26,6 +26,7 @@ from superflore.utils import err
 from superflore.utils import get_pkg_version
 from superflore.utils import make_dir
 from superflore.utils import ok
+from superflore.utils import remove_suffix
 from superflore.utils import retry_on_exception
 from superflore.utils import warn
 
@@ -103,7 +104,7 @@ def regenerate_pkg(
     elif existing:
         overlay.repo.remove_file(existing, True)
         idx_version = existing.rfind('_') + len('_')
-        previous_version = existing[idx_version:].rstrip('.bb')
+        previous_version = remove_suffix(existing[idx_version:], '.bb')
     try:
         current = oe_recipe(
             distro, pkg, srcrev_cache, skip_keys
@@ -29,6 +29,8 @@ from superflore.utils import get_distros
 from superflore.utils import get_pkg_version
 from superflore.utils import make_dir
 from superflore.utils import ok
+from superflore.utils import remove_prefix
+from superflore.utils import remove_suffix
 from superflore.utils import retry_on_exception
 from superflore.utils import warn
 
@@ -69,7 +71,9 @@ def regenerate_pkg(overlay, pkg, distro, preserve_existing=False):
         return None, [], None
     elif existing:
         overlay.repo.remove_file(existing[0])
-        previous_version = existing[0].lstrip(prefix).rstrip('.ebuild')
+        previous_version = remove_suffix(
+            remove_prefix(existing[0], prefix + pkg + '-'), '.ebuild'
+        )
         manifest_file = '{0}/ros-{1}/{2}/Manifest'.format(
             overlay.repo.repo_dir, distro.name, pkg
         )
@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import glob
 import os
 
 from rosdistro.dependency_walker import DependencyWalker
@@ -28,6 +27,7 @@ from superflore.utils import get_distros
 from superflore.utils import get_pkg_version
 from superflore.utils import make_dir
 from superflore.utils import ok
+from superflore.utils import remove_suffix
 from superflore.utils import retry_on_exception
 from superflore.utils import warn
 
@@ -41,89 +41,263 @@ no_python3 = ['tf']
 org = "Open Source Robotics Foundation"
 org_license = "BSD"
 
+# Generating a pkgbuild is dominated by fetching its package.xml, so
+# packages are generated on a pool of threads to overlap the requests.
+gen_workers = 16
 
-def regenerate_pkg(overlay, pkg, distro, preserve_existing=False):
-    version = get_pkg_version(distro, pkg)
-    pkgbuild_name =\
-        '/ros-{0}/{1}/{1}.pkgbuild'.format(distro.name, pkg)
-    pkgbuild_name = overlay.repo.repo_dir + pkgbuild_name
-    patch_path = '/ros-{}/{}/files'.format(distro.name, pkg)
-    patch_path = overlay.repo.repo_dir + patch_path
-    is_ros2 = get_distros()[distro.name]['distribution_type'] == 'ros2'
+# The package names and the distribution type are the same for every
+# package of a distro, so they are looked up once per distro name. The
+# names are kept as a set, since they are only used for membership tests.
+_pkg_names_cache = dict()
+_is_ros2_cache = dict()
+
+
+def _get_pkg_names(distro):
+    if distro.name not in _pkg_names_cache:
+        _pkg_names_cache[distro.name] =\
+            frozenset(get_package_names(distro)[0])
+    return _pkg_names_cache[distro.name]
+
+
+def _is_ros2(distro):
+    if distro.name not in _is_ros2_cache:
+        distro_type = get_distros()[distro.name]['distribution_type']
+        _is_ros2_cache[distro.name] = distro_type == 'ros2'
+    return _is_ros2_cache[distro.name]
+
+
+def _pkg_dir(repo_dir, distro_name, pkg):
+    return f"{repo_dir}/ros-{distro_name}/{pkg}"
+
+
+def _list_files(dirname, suffix):
+    """Return the paths of the files in 'dirname' ending with 'suffix'."""
+    try:
+        with os.scandir(dirname) as entries:
+            return [
+                e.path for e in entries
+                if e.name.endswith(suffix) and not e.name.startswith('.')
+            ]
+    except FileNotFoundError:
+        return []
+
+
+def _fetch_pkg_xml(ros_pkg, distro_name):
+    return retry_on_exception(
+        ros_pkg.get_package_xml, distro_name,
+        retry_msg='Could not fetch package.xml for %s,' % ros_pkg.name,
+        error_msg='Giving up on package.xml for %s,' % ros_pkg.name,
+    )
+
+
+def _find_existing(pkg_dir):
+    """
+    Find a (potentially) existing pkgbuild, returning its version and
+    the files to remove from source control before regenerating it. The
+    version is None unless the file is named '<pkg>-<version>.pkgbuild'.
+    """
+    existing = _list_files(pkg_dir, '.pkgbuild')
+    if not existing:
+        return None, []
+    prefix = f"{pkg_dir}/{os.path.basename(pkg_dir)}-"
+    version = None
+    if existing[0].startswith(prefix):
+        version = remove_suffix(existing[0][len(prefix):], '.pkgbuild')
+    # a missing Manifest would make git reject the whole batched removal.
+    manifest = f"{pkg_dir}/Manifest"
+    if os.path.isfile(manifest):
+        return version, [existing[0], manifest]
+    return version, [existing[0]]
+
+
+def _gen_pkgbuild(
+    repo_dir, pkg, distro, is_ros2, pkg_names, metadata_fetch=None
+):
+    """
+    Generate the pkgbuild for a single package and write its PKGBUILD.
+
+    This does all of the network and disk I/O for the package but does
+    not touch git, so it is safe to run on a worker thread once the old
+    pkgbuild has been removed. 'metadata_fetch' is an optional future of
+    _fetch_pkg_xml started ahead of time. Returns the arch_pkgbuild,
+    the path of the PKGBUILD, which is None if dependencies are
+    unresolved, and whether it was written, which it is not if the
+    PKGBUILD on disk is already up to date.
+    """
+    pkg_dir = _pkg_dir(repo_dir, distro.name, pkg)
+    patch_path = f"{pkg_dir}/files"
     has_patches = os.path.exists(patch_path)
-    pkg_names = get_package_names(distro)[0]
     patches = None
-    if os.path.exists(patch_path):
-        patches = [
-            f for f in glob.glob('%s/*.patch' % patch_path)
-        ]
+    if has_patches:
+        patches = _list_files(patch_path, '.patch')
+    current = arch_pkgbuild(
+        distro, pkg, has_patches, pkg_names, metadata_fetch
+    )
+    current.pkgbuild.name = pkg
+    current.pkgbuild.version = get_pkg_version(distro, pkg)
+    current.pkgbuild.patches = patches
+    current.pkgbuild.is_ros2 = is_ros2
+    pkgbuild_file = f"{pkg_dir}/PKGBUILD"
+    try:
+        pkgbuild_text = current.pkgbuild_text()
+    except UnresolvedDependency:
+        return current, None, False
+    # leave a PKGBUILD that already has this text untouched.
+    try:
+        with open(pkgbuild_file, "r") as pkgbuild_file_f:
+            if pkgbuild_file_f.read() == pkgbuild_text:
+                return current, pkgbuild_file, False
+    except FileNotFoundError:
+        pass
+    make_dir(pkg_dir)
+    try:
+        with open(pkgbuild_file, "w") as pkgbuild_file_f:
+            pkgbuild_file_f.write(pkgbuild_text)
+    except Exception as e:
+        err(f"Failed to write {pkgbuild_file} to disk!")
+        raise e
+    return current, pkgbuild_file, True
+
+
+def submit_pkgs(executor, overlay, pkgs, distro, preserve_existing=False):
+    """
+    Start generating the pkgbuilds for 'pkgs' on 'executor'.
+
+    Existing pkgbuilds are removed from source control up front, on the
+    calling thread, in batched git calls. Returns a dictionary mapping
+    package names to their previous version, whether an old pkgbuild was
+    removed, and their package.xml fetch and generation futures, to be
+    handed to regenerate_pkg, which consumes them on the calling thread.
+    """
+    is_ros2 = _is_ros2(distro)
+    pkg_names = _get_pkg_names(distro)
+    to_generate = list()
+    for pkg in pkgs:
+        if pkg not in pkg_names:
+            continue
+        pkg_dir = _pkg_dir(overlay.repo.repo_dir, distro.name, pkg)
+        pkgbuild_name = f"{pkg_dir}/{pkg}.pkgbuild"
+        if preserve_existing and os.path.isfile(pkgbuild_name):
+            continue
+        to_generate.append(pkg)
+    fetches = dict()
+    pending = dict()
+    try:
+        # queue every package.xml fetch first, so the requests go out at
+        # the full width of the pool while the generation tasks wait
+        # behind them.
+        for pkg in to_generate:
+            release_pkg = distro.release_packages[pkg]
+            repo = distro.repositories[
+                release_pkg.repository_name
+            ].release_repository
+            fetches[pkg] = executor.submit(
+                _fetch_pkg_xml, RosPackage(pkg, repo), distro.name
+            )
+        previous_versions = dict()
+        removed = dict()
+        to_remove = list()
+        for pkg in to_generate:
+            pkg_dir = _pkg_dir(overlay.repo.repo_dir, distro.name, pkg)
+            previous_versions[pkg], existing = _find_existing(pkg_dir)
+            removed[pkg] = bool(existing)
+            to_remove.extend(existing)
+        # the removals must land before any worker writes to those
+        # directories.
+        overlay.repo.remove_files(to_remove)
+        for pkg in to_generate:
+            generation = executor.submit(
+                _gen_pkgbuild, overlay.repo.repo_dir, pkg, distro, is_ros2,
+                pkg_names, fetches[pkg]
+            )
+            pending[pkg] = (
+                previous_versions[pkg], removed[pkg], fetches.pop(pkg),
+                generation
+            )
+    except BaseException:
+        for fetch in fetches.values():
+            fetch.cancel()
+        cancel_pkgs(pending)
+        raise
+    return pending
+
+
+def cancel_pkgs(pending):
+    """
+    Cancel the queued work of 'pending', as returned by submit_pkgs.
+
+    Tasks already running are left to finish, but nothing else is started,
+    so an aborted run does not wait for (or write) the rest of the distro.
+    """
+    for _, _, fetch, generation in pending.values():
+        generation.cancel()
+        fetch.cancel()
+    pending.clear()
+
+
+def regenerate_pkg(
+    overlay, pkg, distro, preserve_existing=False, pending=None
+):
+    # a package the distro does not release is a KeyError, which callers
+    # report and skip, as with get_pkg_version.
+    if pkg not in distro.release_packages:
+        raise KeyError(pkg)
+    pkg_dir = _pkg_dir(overlay.repo.repo_dir, distro.name, pkg)
+    pkgbuild_name = f"{pkg_dir}/{pkg}.pkgbuild"
+    is_ros2 = _is_ros2(distro)
+    pkg_names = _get_pkg_names(distro)
     if pkg not in pkg_names:
         raise RuntimeError("Unknown package '%s'" % (pkg))
-    # otherwise, remove a (potentially) existing pkgbuild.
-    prefix = '{0}/ros-{1}/{2}/'.format(overlay.repo.repo_dir, distro.name, pkg)
-    existing = glob.glob('%s*.pkgbuild' % prefix)
-    previous_version = None
-    if preserve_existing and os.path.isfile(pkgbuild_name):
+    generation = None
+    if pending and pkg in pending:
+        previous_version, removed, _, generation = pending.pop(pkg)
+    elif preserve_existing and os.path.isfile(pkgbuild_name):
         ok("pkgbuild for package '%s' up to date, skipping..." % pkg)
         return None, [], None
-    elif existing:
-        overlay.repo.remove_file(existing[0])
-        previous_version = existing[0].lstrip(prefix).rstrip('.pkgbuild')
-        manifest_file = '{0}/ros-{1}/{2}/Manifest'.format(
-            overlay.repo.repo_dir, distro.name, pkg
-        )
-        overlay.repo.remove_file(manifest_file)
+    else:
+        # otherwise, remove a (potentially) existing pkgbuild.
+        previous_version, existing = _find_existing(pkg_dir)
+        overlay.repo.remove_files(existing)
+        removed = bool(existing)
     try:
-        current = arch_pkgbuild(distro, pkg, has_patches)
-        current.pkgbuild.name = pkg
-        current.pkgbuild.version = version
-        current.pkgbuild.patches = patches
-        current.pkgbuild.is_ros2 = is_ros2
+        if generation:
+            current, pkgbuild_file, written = generation.result()
+        else:
+            current, pkgbuild_file, written = _gen_pkgbuild(
+                overlay.repo.repo_dir, pkg, distro, is_ros2, pkg_names
+            )
+    except KeyError as ke:
+        err("Failed to parse data for package {}!".format(pkg))
+        raise ke
     except Exception as e:
         err('Failed to generate pkgbuild for package {}!'.format(pkg))
         raise e
-    try:
-        pkgbuild_text = current.pkgbuild_text()
-    except UnresolvedDependency:
+    if not pkgbuild_file:
         dep_err = 'Failed to resolve required dependencies for'
         err("{0} package {1}!".format(dep_err, pkg))
         unresolved = current.pkgbuild.get_unresolved()
         for dep in unresolved:
             err(" unresolved: \"{}\"".format(dep))
         return None, current.pkgbuild.get_unresolved(), None
-    except KeyError as ke:
-        err("Failed to parse data for package {}!".format(pkg))
-        raise ke
-    make_dir(
-        "{}/ros-{}/{}".format(overlay.repo.repo_dir, distro.name, pkg)
-    )
+    if not written and not removed:
+        # nothing changed on disk, so there is no installer to report.
+        ok("pkgbuild for package '%s' up to date, skipping..." % pkg)
+        return current, previous_version, None
     success_msg = 'Successfully generated pkgbuild for package'
     ok('{0} \'{1}\'.'.format(success_msg, pkg))
-
-    try:
-        pkgbuild_file = '{0}/ros-{1}/{2}/PKGBUILD'.format(
-            overlay.repo.repo_dir,
-            distro.name, 
-            pkg,
-        )
-        ok(f"writing {pkgbuild_file}")
-        with open(pkgbuild_file, "w") as pkgbuild_file_f:
-            pkgbuild_file_f.write(pkgbuild_text)
-    except Exception as e:
-        err(f"Failed to write f{pkgbuild_file} to disk!")
-        raise e
+    if written:
+        ok(f"wrote {pkgbuild_file}")
     return current, previous_version, pkg
 
 
-
 def _gen_pkgbuild_for_package(
-    distro, pkg_name, pkg, repo, ros_pkg, pkg_rosinstall
+    distro, pkg_name, pkg, repo, ros_pkg, pkg_rosinstall, pkg_names,
+    metadata_fetch=None
 ):
     pkg_pkgbuild = PkgBuild()
 
     pkg_pkgbuild.distro = distro.name
     pkg_pkgbuild.src_uri = pkg_rosinstall[0]['tar']['uri']
-    pkg_names = get_package_names(distro)
     pkg_dep_walker = DependencyWalker(distro)
 
     pkg_buildtool_deps = pkg_dep_walker.get_depends(pkg_name, "buildtool")
@@ -135,19 +309,19 @@ def _gen_pkgbuild_for_package(
 
     # add run dependencies
     for rdep in pkg_run_deps:
-        pkg_pkgbuild.add_run_depend(rdep, rdep in pkg_names[0])
+        pkg_pkgbuild.add_run_depend(rdep, rdep in pkg_names)
 
     # add build dependencies
     for bdep in pkg_build_deps:
-        pkg_pkgbuild.add_build_depend(bdep, bdep in pkg_names[0])
+        pkg_pkgbuild.add_build_depend(bdep, bdep in pkg_names)
 
     # add build tool dependencies
     for tdep in pkg_buildtool_deps:
-        pkg_pkgbuild.add_build_depend(tdep, tdep in pkg_names[0])
+        pkg_pkgbuild.add_build_depend(tdep, tdep in pkg_names)
 
     # add test dependencies
     for test_dep in pkg_test_deps:
-        pkg_pkgbuild.add_test_depend(test_dep, test_dep in pkg_names[0])
+        pkg_pkgbuild.add_test_depend(test_dep, test_dep in pkg_names)
 
     # add keywords
     for key in pkg_keywords:
@@ -155,9 +329,14 @@ def _gen_pkgbuild_for_package(
 
     # parse through package xml
     try:
-        pkg_xml = retry_on_exception(ros_pkg.get_package_xml, distro.name)
-    except Exception:
-        warn("fetch metadata for package {}".format(pkg_name))
+        if metadata_fetch:
+            pkg_xml = metadata_fetch.result()
+        else:
+            pkg_xml = _fetch_pkg_xml(ros_pkg, distro.name)
+    except Exception as e:
+        warn("Failed to fetch metadata for package {}: {}".format(
+            pkg_name, e
+        ))
         return pkg_pkgbuild
     pkg = PackageMetadata(pkg_xml)
     pkg_pkgbuild.upstream_license = pkg.upstream_license
@@ -168,7 +347,15 @@ def _gen_pkgbuild_for_package(
 
 
 class arch_pkgbuild(object):
-    def __init__(self, distro, pkg_name, has_patches=False):
+    def __init__(
+        self, distro, pkg_name, has_patches=False, pkg_names=None,
+        metadata_fetch=None
+    ):
+        # pkg_names is the set of package names of the distro, which
+        # callers generating many packages should compute only once, and
+        # metadata_fetch a future of the package.xml fetched ahead of time.
+        if pkg_names is None:
+            pkg_names = _get_pkg_names(distro)
         pkg = distro.release_packages[pkg_name]
         repo = distro.repositories[pkg.repository_name].release_repository
         ros_pkg = RosPackage(pkg_name, repo)
@@ -177,9 +364,10 @@ class arch_pkgbuild(object):
             _generate_rosinstall(pkg_name, repo.url,
                                  get_release_tag(repo, pkg_name), True)
 
-        self.pkgbuild =\
-            _gen_pkgbuild_for_package(distro, pkg_name,
-                                    pkg, repo, ros_pkg, pkg_rosinstall)
+        self.pkgbuild = _gen_pkgbuild_for_package(
+            distro, pkg_name, pkg, repo, ros_pkg, pkg_rosinstall, pkg_names,
+            metadata_fetch
+        )
         self.pkgbuild.has_patches = has_patches
 
         if pkg_name in no_python3:
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from io import StringIO
+from itertools import chain
 from time import gmtime, strftime
 
 from superflore.exceptions import UnknownBuildType
@@ -29,7 +31,35 @@ depend_only_pkgs = [
 ]
 
 
+# The build() and package() functions of every pkgbuild only differ in
+# the ROS distro, which is filled in with '%' formatting.
+build_function = (
+    '\n'
+    'build() {\n'
+    '    cd "${srcdir}"\n'
+    '    [ -f /opt/ros/%(distro)s/setup.bash ] &&'
+    ' source /opt/ros/%(distro)s/setup.bash\n'
+    '    colcon build\n'
+    '}\n'
+)
+
+package_function = (
+    '\n'
+    'package() {\n'
+    '    cd "${srcdir}"\n'
+    '    colcon build --install-base "${pkgdir}"/opt/ros/%(distro)s\n'
+    '    rm "${pkgdir}"/opt/ros/%(distro)s/*setup*\n'
+    '    rm "${pkgdir}"/opt/ros/%(distro)s/COLCON_IGNORE\n'
+    '    rm "${pkgdir}"/opt/ros/%(distro)s/.colcon_install_layout\n'
+    '    chown -R ros:ros "${pkgdir}"/opt/ros/%(distro)s\n'
+    '    chmod -R 777 "${pkgdir}"/opt/ros/%(distro)s\n'
+    '}\n'
+)
+
+
 class pkgbuild_keyword(object):
+    __slots__ = ('arch', 'stable')
+
     def __init__(self, arch, stable):
         self.arch = arch
         self.stable = stable
@@ -41,7 +71,11 @@ class pkgbuild_keyword(object):
             return '~{0}'.format(self.arch)
 
     def __eq__(self, other):
-        return self.to_string() == other.to_string()
+        return self.arch == other.arch and \
+            bool(self.stable) == bool(other.stable)
+
+    def __hash__(self):
+        return hash((self.arch, bool(self.stable)))
 
 
 class PkgBuild(object):
@@ -49,19 +83,30 @@ class PkgBuild(object):
     Basic definition of an pkgbuild file.
     This is where any necessary variables will be filled.
     """
+    __slots__ = (
+        'description', 'homepage', 'src_uri', 'upstream_license', 'keys',
+        'rdepends', 'rdepends_external', 'depends', 'depends_external',
+        'tdepends', 'tdepends_external', 'distro', 'cmake_package',
+        'base_yml', 'version', 'unresolved_deps', 'name', 'has_patches',
+        'build_type', 'is_ros2', 'python_3', 'patches',
+    )
+    eapi = str(6)
+    illegal_desc_chars = '()[]{}|^$\\#\t\n\r\v\f\'"`'
+
     def __init__(self):
-        self.eapi = str(6)
         self.description = ""
         self.homepage = "https://wiki.ros.org"
         self.src_uri = None
         self.upstream_license = ["LGPL-2"]
         self.keys = list()
-        self.rdepends = list()
-        self.rdepends_external = list()
-        self.depends = list()
-        self.depends_external = list()
-        self.tdepends = list()
-        self.tdepends_external = list()
+        # dependencies are kept as the keys of dictionaries, which keeps
+        # them in insertion order while making lookups and duplicates cheap.
+        self.rdepends = dict()
+        self.rdepends_external = dict()
+        self.depends = dict()
+        self.depends_external = dict()
+        self.tdepends = dict()
+        self.tdepends_external = dict()
         self.distro = None
         self.cmake_package = True
         self.base_yml = None
@@ -73,7 +118,6 @@ class PkgBuild(object):
         self.is_ros2 = False
         self.python_3 = True
         self.patches = list()
-        self.illegal_desc_chars = '()[]{}|^$\\#\t\n\r\v\f\'"`'
 
     def add_build_depend(self, depend, internal=True):
         if depend in self.rdepends:
@@ -81,23 +125,23 @@ class PkgBuild(object):
         elif depend in self.rdepends_external:
             return
         elif internal:
-            self.depends.append(depend)
+            self.depends[depend] = None
         else:
-            self.depends_external.append(depend)
+            self.depends_external[depend] = None
 
     def add_run_depend(self, rdepend, internal=True):
         if rdepend in depend_only_pkgs and not internal:
-            self.depends_external.append(rdepend)
+            self.depends_external[rdepend] = None
         elif internal:
-            self.rdepends.append(rdepend)
+            self.rdepends[rdepend] = None
         else:
-            self.rdepends_external.append(rdepend)
+            self.rdepends_external[rdepend] = None
 
     def add_test_depend(self, tdepend, internal=True):
         if not internal:
-            self.tdepends_external.append(tdepend)
+            self.tdepends_external[tdepend] = None
         else:
-            self.tdepends.append(tdepend)
+            self.tdepends[tdepend] = None
 
     def add_keyword(self, keyword, stable=False):
         self.keys.append(pkgbuild_keyword(keyword, stable))
@@ -131,66 +175,61 @@ class PkgBuild(object):
         else:
             raise UnknownBuildType(self.build_type)
 
+    def get_arch_depends(self, ros_depends, external_depends):
+        """
+        Return the Arch package names of the given dependencies: ROS
+        packages get the distro prefix and python3 packages lose their 3.
+        Each group is sorted, so the text does not depend on the order the
+        dependencies were added in.
+        """
+        ros_prefix = f"ros-{self.distro}-"
+        return [
+            'python' + dep[7:] if dep.startswith('python3') else dep
+            for dep in chain(
+                (ros_prefix + d for d in sorted(ros_depends)),
+                sorted(external_depends)
+            )
+        ]
+
     def get_pkgbuild_text(self, distributor, license_text):
         """
         Generate the pkgbuild in text, given the distributor line
         and the license text.
         """
-        # EAPI=<eapi>
-        entries = []
-        entries.append("# Script generated with superflore")
-        entries.append("# Maintainer: Sebastian Mai <sebastian.mai@ovgu.de>")
+        ret = StringIO()
+        ret.write("# Script generated with superflore\n")
+        ret.write("# Maintainer: Sebastian Mai <sebastian.mai@ovgu.de>\n")
         self.description =\
             sanitize_string(self.description, self.illegal_desc_chars)
         self.description = trim_string(self.description)
 
-        entries.append(f"pkgname='ros-{self.distro}-{self.name}'")
-        entries.append(f'pkgdesc="{self.description}"')
-        entries.append(f"url={self.homepage}")
+        ret.write(f"pkgname='ros-{self.distro}-{self.name}'\n")
+        ret.write(f'pkgdesc="{self.description}"\n')
+        ret.write(f"url={self.homepage}\n")
         version_str = self.version.split("-")[0]
         rc = self.version.split("-")[1][1:]
-        entries.append(f"pkgver={version_str}")
-        entries.append(f"arch=('any')")
-        entries.append(f"pkgrel={rc}")
-        license_str = [ f"'{ul}'" for ul in self.upstream_license]
-        entries.append(f"license=({' '.join(license_str)})")
-        entries.append(f"epoch=0")
-        entries.append(f"groups=('ros' 'ros-{self.distro}')")
-        ros_deps = [f"ros-{self.distro}-{d}" for d in self.depends]
-        dependencies = (ros_deps + self.depends_external)
-        for i, dep in enumerate(dependencies):
-            if dep.startswith("python3"):
-                dependencies[i] = dep.replace("python3", "python", 1)
-        entries.append(f"makedepends=({' '.join(dependencies)})")
-        ros_rdeps = [f"ros-{self.distro}-{d}" for d in self.rdepends] 
-        rdependencies = (ros_rdeps + self.rdepends_external)
-        for i, dep in enumerate(rdependencies):
-            if dep.startswith("python3"):
-                rdependencies[i] = dep.replace("python3", "python", 1)
-        entries.append(f"depends=({' '.join(rdependencies)})")
-        entries.append(f'source=("ros-{self.distro}-{self.name}-{self.version}.tar.gz::{self.src_uri}")')
-        entries.append(f"md5sums=('SKIP')")
-        entries.append(f"""
-build() {{
-    cd "${{srcdir}}"
-    [ -f /opt/ros/{self.distro}/setup.bash ] && source /opt/ros/{self.distro}/setup.bash
-    colcon build
-}}
-""")
-
-        entries.append(f"""
-package() {{
-    cd "${{srcdir}}"
-    colcon build --install-base "${{pkgdir}}"/opt/ros/{self.distro}
-    rm "${{pkgdir}}"/opt/ros/{self.distro}/*setup*
-    rm "${{pkgdir}}"/opt/ros/{self.distro}/COLCON_IGNORE
-    rm "${{pkgdir}}"/opt/ros/{self.distro}/.colcon_install_layout
-    chown -R ros:ros "${{pkgdir}}"/opt/ros/{self.distro}
-    chmod -R 777 "${{pkgdir}}"/opt/ros/{self.distro}
-}}
-""")
-        return "\n".join(entries)
+        ret.write(f"pkgver={version_str}\n")
+        ret.write("arch=('any')\n")
+        ret.write(f"pkgrel={rc}\n")
+        license_str = [f"'{ul}'" for ul in self.upstream_license]
+        ret.write(f"license=({' '.join(license_str)})\n")
+        ret.write("epoch=0\n")
+        ret.write(f"groups=('ros' 'ros-{self.distro}')\n")
+        dependencies =\
+            self.get_arch_depends(self.depends, self.depends_external)
+        ret.write(f"makedepends=({' '.join(dependencies)})\n")
+        rdependencies =\
+            self.get_arch_depends(self.rdepends, self.rdepends_external)
+        ret.write(f"depends=({' '.join(rdependencies)})\n")
+        ret.write(
+            f'source=("ros-{self.distro}-{self.name}-{self.version}.tar.gz'
+            f'::{self.src_uri}")\n'
+        )
+        ret.write("md5sums=('SKIP')\n")
+        ret.write(build_function % {'distro': self.distro})
+        ret.write("\n")
+        ret.write(package_function % {'distro': self.distro})
+        return ret.getvalue()
 
     def get_unresolved(self):
         return self.unresolved_deps
- 
\ No newline at end of file
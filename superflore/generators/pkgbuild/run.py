@@ -12,13 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
 
 from rosinstall_generator.distro import get_distro
+from rosinstall_generator.distro import get_package_names
 from superflore.exceptions import NoGitHubAuthToken
 from superflore.generate_installers import generate_installers
+from superflore.generators.pkgbuild.gen_packages import cancel_pkgs
+from superflore.generators.pkgbuild.gen_packages import gen_workers
 from superflore.generators.pkgbuild.gen_packages import regenerate_pkg
+from superflore.generators.pkgbuild.gen_packages import submit_pkgs
 from superflore.generators.pkgbuild.overlay_instance import RosOverlay
 from superflore.parser import get_parser
 from superflore.repo_instance import RepoInstance
@@ -118,29 +123,49 @@ def main():
             )
             missing_depends = set()
             to_commit = set()
+            up_to_date = set()
             will_file_pr = False
-            for pkg in args.only:
-                if pkg in skip_keys:
-                    warn("Package '%s' is in skip-keys list, skipping..."
-                         % pkg)
-                    continue
-                info("Regenerating package '%s'..." % pkg)
+            distro = get_distro(args.ros_distro)
+            only = [pkg for pkg in args.only if pkg not in skip_keys]
+            with ThreadPoolExecutor(max_workers=gen_workers) as executor:
+                pending = submit_pkgs(
+                    executor, overlay, only, distro, preserve_existing
+                )
                 try:
-                    pkgbuild, deps, version = regenerate_pkg(
-                        overlay,
-                        pkg,
-                        get_distro(args.ros_distro),
-                        preserve_existing
-                    )
-                    if not pkgbuild:
-                        for dep in deps:
-                            missing_depends.add(dep)
-                except KeyError:
-                    err("No package to satisfy key '%s'" % pkg)
-                    continue
-                if pkgbuild:
-                    to_commit.add(pkg)
-                    will_file_pr = True
+                    for pkg in args.only:
+                        if pkg in skip_keys:
+                            warn(
+                                "Package '%s' is in skip-keys list, "
+                                "skipping..." % pkg
+                            )
+                            continue
+                        info("Regenerating package '%s'..." % pkg)
+                        try:
+                            pkgbuild, deps, name = regenerate_pkg(
+                                overlay,
+                                pkg,
+                                distro,
+                                preserve_existing,
+                                pending
+                            )
+                            if not pkgbuild:
+                                for dep in deps:
+                                    missing_depends.add(dep)
+                        except KeyError:
+                            err("No package to satisfy key '%s'" % pkg)
+                            continue
+                        if pkgbuild and not name:
+                            up_to_date.add(pkg)
+                        elif pkgbuild:
+                            to_commit.add(pkg)
+                            will_file_pr = True
+                finally:
+                    cancel_pkgs(pending)
+            if not will_file_pr and up_to_date and not missing_depends:
+                info('Package(s) %s up to date.' % sorted(up_to_date))
+                info('Exiting...')
+                clean_up()
+                sys.exit(0)
             # if no packages succeeded, exit with error
             if not will_file_pr:
                 err("No packages generated successfully, exiting.")
@@ -169,14 +194,28 @@ def main():
             sys.exit(0)
 
         for distro in selected_targets:
-            distro_installers, distro_broken, distro_changes =\
-                generate_installers(
-                    get_distro(distro),
-                    overlay=overlay,
-                    gen_pkg_func=regenerate_pkg,
-                    preserve_existing=preserve_existing,
-                    skip_keys=skip_keys,
+            ros_distro = get_distro(distro)
+            pkgs = [
+                pkg for pkg in get_package_names(ros_distro)[0]
+                if pkg not in skip_keys
+            ]
+            with ThreadPoolExecutor(max_workers=gen_workers) as executor:
+                pending = submit_pkgs(
+                    executor, overlay, sorted(pkgs), ros_distro,
+                    preserve_existing
                 )
+                try:
+                    distro_installers, distro_broken, distro_changes =\
+                        generate_installers(
+                            ros_distro,
+                            overlay,
+                            regenerate_pkg,
+                            preserve_existing,
+                            pending,
+                            skip_keys=skip_keys,
+                        )
+                finally:
+                    cancel_pkgs(pending)
             for key in distro_broken.keys():
                 for pkg in distro_broken[key]:
                     total_broken.add(pkg)
@@ -66,6 +66,21 @@ class RepoInstance(object):
             err(fail_msg)
             err(' Exception: {0}'.format(g))
 
+    def remove_files(self, filenames, ignore_fail=False, batch_size=256):
+        """
+        Remove several files from source control, 'batch_size' files per
+        git call, falling back to one call per file if a batch is rejected.
+        """
+        filenames = list(filenames)
+        for start in range(0, len(filenames), batch_size):
+            batch = filenames[start:start + batch_size]
+            try:
+                self.git.rm('-f', '--', *batch)
+            except GitGotGot:
+                # git rm is all or nothing, so find out which file failed.
+                for filename in batch:
+                    self.remove_file(filename, ignore_fail)
+
     def create_branch(self, branch_name):
         """
         @todo: error checking
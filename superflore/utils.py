@@ -129,13 +129,17 @@ def rand_ascii_str(length=10):
     return ''.join(random.choice(string.ascii_letters) for x in range(length))
 
 
+# compiled character classes for sanitize_string, keyed by illegal_chars
+_sanitize_patterns = dict()
+
+
 def sanitize_string(string, illegal_chars):
-    ret = str()
-    for c in string:
-        if c in illegal_chars:
-            ret += '\\'
-        ret += c
-    return ret
+    if not illegal_chars:
+        return string
+    if illegal_chars not in _sanitize_patterns:
+        _sanitize_patterns[illegal_chars] =\
+            re.compile('[%s]' % re.escape(illegal_chars))
+    return _sanitize_patterns[illegal_chars].sub(r'\\\g<0>', string)
 
 
 def trim_string(string, length=80):
@@ -145,6 +149,18 @@ def trim_string(string, length=80):
     return string[:length - len(end_string)] + end_string
 
 
+def remove_prefix(string, prefix):
+    if prefix and string.startswith(prefix):
+        return string[len(prefix):]
+    return string
+
+
+def remove_suffix(string, suffix):
+    if suffix and string.endswith(suffix):
+        return string[:-len(suffix)]
+    return string
+
+
 def get_license(l):
     bsd_re = '^(BSD)((.)*([124]))?'
     gpl_re = '((([^L])*(GPL)([^0-9]*))|'\
@@ -51,6 +51,14 @@ def _create_if_p2os(overlay, pkg, distro, preserve_existing, collector):
     return True, True, pkg
 
 
+def _unchanged_if_p2os(overlay, pkg, distro, preserve_existing, collector):
+    """Report p2os packages as already up to date"""
+    collector.append(pkg)
+    if 'p2os' in pkg:
+        return True, None, None
+    return True, False, pkg
+
+
 def _raise_exceptions(overlay, pkg, distro, preserve_existing, collector):
     """Raise exceptions"""
     collector.append(pkg)
@@ -130,3 +138,16 @@ class TestGenerateInstallers(unittest.TestCase):
                 print(ret.groups())
                 self.assertIn('p2os', ret.group(0))
         self.assertTrue(found)
+
+    def test_unchanged(self):
+        """Tests installers that are already up to date"""
+        acc = list()
+        inst, broken, changes = generate_installers(
+            get_distro('lunar'), None, _unchanged_if_p2os, False, acc
+        )
+        self.assertTrue(any('p2os' in p for p in acc))
+        self.assertEqual(broken, {})
+        # up to date installers are neither regenerated nor changed
+        self.assertEqual(sorted(inst), [p for p in acc if 'p2os' not in p])
+        for c in changes:
+            self.assertNotIn('p2os', c)
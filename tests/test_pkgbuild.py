@@ -0,0 +1,113 @@
+# Copyright 2020 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from superflore.generators.pkgbuild.pkgbuild import PkgBuild
+from superflore.generators.pkgbuild.pkgbuild import pkgbuild_keyword
+import pickle
+import random
+import unittest
+
+
+class TestPkgBuildOutput(unittest.TestCase):
+    def get_pkgbuild(self):
+        pkgbuild = PkgBuild()
+        pkgbuild.homepage = 'https://www.website.com'
+        pkgbuild.description = 'a pkgbuild'
+        pkgbuild.src_uri = 'https://www.website.com/download/foo/archive/foo/release/noetic/0.0.0.tar.gz'
+        pkgbuild.name = 'foo'
+        pkgbuild.distro = 'noetic'
+        pkgbuild.version = '0.0.0-r1'
+        pkgbuild.upstream_license = ['BSD']
+        return pkgbuild
+
+    def test_simple(self):
+        """Test PkgBuild Format"""
+        pkgbuild = self.get_pkgbuild()
+        pkgbuild.add_build_depend('catkin')
+        pkgbuild.add_build_depend('python3-yaml', False)
+        pkgbuild.add_run_depend('p2os_driver')
+        pkgbuild.add_run_depend('python3-numpy', False)
+        got_text = pkgbuild.get_pkgbuild_text('Open Source Robotics Foundation', 'BSD')
+        with open('tests/pkgbuild/simple_expected.pkgbuild', 'r') as expect_file:
+            correct_text = expect_file.read()
+        self.assertEqual(got_text, correct_text)
+
+    def test_description_escaped(self):
+        """Test Escaping Of Illegal Description Characters"""
+        pkgbuild = self.get_pkgbuild()
+        pkgbuild.description = 'a "quoted" $description'
+        got_text = pkgbuild.get_pkgbuild_text('Open Source Robotics Foundation', 'BSD')
+        self.assertTrue('pkgdesc="a \\"quoted\\" \\$description"' in got_text)
+
+    def test_pkgbuild_keyword(self):
+        """Test Keyword Comparison"""
+        self.assertEqual(pkgbuild_keyword('amd64', True).to_string(), 'amd64')
+        self.assertEqual(pkgbuild_keyword('amd64', False).to_string(), '~amd64')
+        self.assertEqual(
+            pkgbuild_keyword('amd64', False), pkgbuild_keyword('amd64', False)
+        )
+        self.assertNotEqual(
+            pkgbuild_keyword('amd64', True), pkgbuild_keyword('amd64', False)
+        )
+        self.assertNotEqual(
+            pkgbuild_keyword('amd64', True), pkgbuild_keyword('arm64', True)
+        )
+        keys = {pkgbuild_keyword('amd64', True), pkgbuild_keyword('amd64', True)}
+        self.assertEqual(len(keys), 1)
+
+    def test_rdepend_depend(self):
+        """Test Disjoint And Unique Dependencies"""
+        pkgbuild = self.get_pkgbuild()
+        pkgbuild.add_run_depend('p2os_driver')
+        pkgbuild.add_build_depend('p2os_driver')
+        self.assertTrue('p2os_driver' in pkgbuild.rdepends)
+        self.assertFalse('p2os_driver' in pkgbuild.depends)
+        pkgbuild.add_build_depend('catkin')
+        pkgbuild.add_build_depend('catkin')
+        got_text = pkgbuild.get_pkgbuild_text('Open Source Robotics Foundation', 'BSD')
+        self.assertTrue('makedepends=(ros-noetic-catkin)' in got_text)
+
+    def test_dependency_order(self):
+        """Test Output Does Not Depend On Dependency Order"""
+        depends = [
+            ('catkin', True), ('roscpp', True), ('std_msgs', True),
+            ('python3-yaml', False), ('boost', False),
+        ]
+        texts = set()
+        for seed in range(5):
+            random.Random(seed).shuffle(depends)
+            pkgbuild = self.get_pkgbuild()
+            for dep, internal in depends:
+                pkgbuild.add_build_depend(dep, internal)
+                pkgbuild.add_run_depend(dep, internal)
+            texts.add(pkgbuild.get_pkgbuild_text(
+                'Open Source Robotics Foundation', 'BSD'
+            ))
+        self.assertEqual(len(texts), 1)
+        self.assertTrue(
+            'depends=(ros-noetic-catkin ros-noetic-roscpp '
+            'ros-noetic-std_msgs boost python-yaml)' in texts.pop()
+        )
+
+    def test_pickle(self):
+        """Test Rendering After A Pickle Round Trip"""
+        pkgbuild = self.get_pkgbuild()
+        pkgbuild.add_build_depend('catkin')
+        pkgbuild.add_run_depend('python3-numpy', False)
+        pkgbuild.add_keyword('amd64')
+        copy = pickle.loads(pickle.dumps(pkgbuild))
+        self.assertEqual(
+            copy.get_pkgbuild_text('Open Source Robotics Foundation', 'BSD'),
+            pkgbuild.get_pkgbuild_text('Open Source Robotics Foundation', 'BSD')
+        )
@@ -0,0 +1,240 @@
+# Copyright 2020 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+from tempfile import mkdtemp
+import threading
+from types import SimpleNamespace
+
+from superflore.generators.pkgbuild import gen_packages
+from superflore.generators.pkgbuild.gen_packages import _find_existing
+from superflore.generators.pkgbuild.gen_packages import _gen_pkgbuild
+from superflore.generators.pkgbuild.gen_packages import cancel_pkgs
+from superflore.generators.pkgbuild.gen_packages import regenerate_pkg
+from superflore.generators.pkgbuild.gen_packages import submit_pkgs
+from superflore.generators.pkgbuild.pkgbuild import PkgBuild
+import unittest
+from unittest import mock
+
+
+pkgs = ['a', 'b', 'c']
+
+
+def get_distro():
+    """A distro releasing 'pkgs', each from its own repository"""
+    return SimpleNamespace(
+        name='fake',
+        release_packages={
+            p: SimpleNamespace(repository_name=p) for p in pkgs
+        },
+        repositories={
+            p: SimpleNamespace(
+                release_repository=SimpleNamespace(version='1.0.0-1')
+            ) for p in pkgs
+        },
+    )
+
+
+class FakeRepo(object):
+    def __init__(self):
+        self.repo_dir = mkdtemp()
+        self.removed = list()
+
+    def remove_files(self, filenames, ignore_fail=False):
+        self.removed.extend(filenames)
+
+
+class TestPkgBuildGeneration(unittest.TestCase):
+    def setUp(self):
+        self.overlay = SimpleNamespace(repo=FakeRepo())
+        self.distro = get_distro()
+        self.calls = list()
+        self.calls_lock = threading.Lock()
+        patches = [
+            mock.patch.dict(
+                gen_packages._pkg_names_cache, fake=frozenset(pkgs)
+            ),
+            mock.patch.dict(gen_packages._is_ros2_cache, fake=False),
+            mock.patch.object(gen_packages, '_fetch_pkg_xml', self.fetch),
+            mock.patch.object(gen_packages, '_gen_pkgbuild', self.generate),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def record(self, call):
+        with self.calls_lock:
+            self.calls.append(call)
+
+    def fetch(self, ros_pkg, distro_name):
+        self.record(('fetch', ros_pkg.name))
+        return '<package/>'
+
+    def generate(
+        self, repo_dir, pkg, distro, is_ros2, pkg_names, metadata_fetch=None
+    ):
+        self.record(('generate', pkg))
+        metadata_fetch.result()
+        current = SimpleNamespace(pkgbuild=SimpleNamespace(version='1.0.0'))
+        return current, f"{repo_dir}/ros-fake/{pkg}/PKGBUILD", True
+
+    def test_fetches_first(self):
+        """Test Package.xml Fetches Are Queued Before Generation"""
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = submit_pkgs(executor, self.overlay, pkgs, self.distro)
+            for pkg in pkgs:
+                regenerate_pkg(self.overlay, pkg, self.distro, False, pending)
+        self.assertEqual(
+            self.calls,
+            [('fetch', p) for p in pkgs] + [('generate', p) for p in pkgs]
+        )
+
+    def test_pending_consumed(self):
+        """Test Regeneration Consumes The Pending Generations"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pending = submit_pkgs(executor, self.overlay, pkgs, self.distro)
+            self.assertEqual(sorted(pending), pkgs)
+            current, previous, name = regenerate_pkg(
+                self.overlay, 'b', self.distro, False, pending
+            )
+            self.assertEqual(name, 'b')
+            self.assertEqual(previous, None)
+            self.assertEqual(sorted(pending), ['a', 'c'])
+            cancel_pkgs(pending)
+        self.assertEqual(self.calls.count(('generate', 'b')), 1)
+
+    def test_unknown_package(self):
+        """Test An Unknown Package Raises A KeyError"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pending = submit_pkgs(
+                executor, self.overlay, pkgs + ['bogus'], self.distro
+            )
+            self.assertFalse('bogus' in pending)
+            with self.assertRaises(KeyError):
+                regenerate_pkg(
+                    self.overlay, 'bogus', self.distro, False, pending
+                )
+            cancel_pkgs(pending)
+
+    def test_cancel(self):
+        """Test Queued Work Is Cancelled"""
+        release = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # keep the only worker busy, so everything else stays queued.
+            executor.submit(release.wait)
+            pending = submit_pkgs(executor, self.overlay, pkgs, self.distro)
+            queued = [f for e in pending.values() for f in e[2:]]
+            cancel_pkgs(pending)
+            release.set()
+        self.assertEqual(pending, dict())
+        self.assertTrue(all(f.cancelled() for f in queued))
+        self.assertEqual(self.calls, list())
+
+
+class FakeArchPkgBuild(object):
+    """Stands in for arch_pkgbuild, without fetching anything"""
+    def __init__(
+        self, distro, pkg_name, has_patches=False, pkg_names=None,
+        metadata_fetch=None
+    ):
+        self.pkgbuild = PkgBuild()
+        self.pkgbuild.distro = distro.name
+        self.pkgbuild.src_uri = f"https://www.website.com/{pkg_name}.tar.gz"
+        self.pkgbuild.add_build_depend('catkin')
+        self.pkgbuild.add_run_depend('roscpp')
+
+    def pkgbuild_text(self):
+        return self.pkgbuild.get_pkgbuild_text(
+            'Open Source Robotics Foundation', 'BSD'
+        )
+
+
+class TestPkgBuildUpToDate(unittest.TestCase):
+    def setUp(self):
+        self.overlay = SimpleNamespace(repo=FakeRepo())
+        self.distro = get_distro()
+        patches = [
+            mock.patch.dict(
+                gen_packages._pkg_names_cache, fake=frozenset(pkgs)
+            ),
+            mock.patch.dict(gen_packages._is_ros2_cache, fake=False),
+            mock.patch.object(
+                gen_packages, 'arch_pkgbuild', FakeArchPkgBuild
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def generate(self):
+        return _gen_pkgbuild(
+            self.overlay.repo.repo_dir, 'a', self.distro, False,
+            frozenset(pkgs)
+        )
+
+    def test_unchanged_not_written(self):
+        """Test An Unchanged PKGBUILD Is Not Written Again"""
+        _, pkgbuild_file, written = self.generate()
+        self.assertTrue(written)
+        _, _, written = self.generate()
+        self.assertFalse(written)
+        # a hand edited PKGBUILD is restored
+        with open(pkgbuild_file, 'a') as pkgbuild_f:
+            pkgbuild_f.write('# edited\n')
+        _, _, written = self.generate()
+        self.assertTrue(written)
+
+    def test_unchanged_no_installer(self):
+        """Test An Unchanged PKGBUILD Reports No Installer"""
+        current, previous, name = regenerate_pkg(
+            self.overlay, 'a', self.distro, False
+        )
+        self.assertTrue(current)
+        self.assertEqual(name, 'a')
+        current, previous, name = regenerate_pkg(
+            self.overlay, 'a', self.distro, False
+        )
+        self.assertTrue(current)
+        self.assertEqual(name, None)
+
+
+class TestFindExisting(unittest.TestCase):
+    def get_pkg_dir(self, *filenames):
+        pkg_dir = os.path.join(mkdtemp(), 'foo')
+        os.mkdir(pkg_dir)
+        for filename in filenames:
+            open(os.path.join(pkg_dir, filename), 'w').close()
+        return pkg_dir
+
+    def test_none(self):
+        """Test A Directory Without A pkgbuild"""
+        self.assertEqual(_find_existing(self.get_pkg_dir()), (None, []))
+        self.assertEqual(_find_existing('/nonexistent/foo'), (None, []))
+
+    def test_versioned(self):
+        """Test A pkgbuild Named After Its Version"""
+        pkg_dir = self.get_pkg_dir('foo-1.2.3-r1.pkgbuild', 'Manifest')
+        version, existing = _find_existing(pkg_dir)
+        self.assertEqual(version, '1.2.3-r1')
+        self.assertEqual(existing, [
+            f"{pkg_dir}/foo-1.2.3-r1.pkgbuild", f"{pkg_dir}/Manifest"
+        ])
+
+    def test_unversioned(self):
+        """Test A pkgbuild Named After Its Package Only"""
+        pkg_dir = self.get_pkg_dir('foo.pkgbuild')
+        version, existing = _find_existing(pkg_dir)
+        self.assertEqual(version, None)
+        self.assertEqual(existing, [f"{pkg_dir}/foo.pkgbuild"])
@@ -0,0 +1,65 @@
+# Copyright 2020 Open Source Robotics Foundation, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from git import Repo
+from superflore.repo_instance import RepoInstance
+from superflore.TempfileManager import TempfileManager
+import unittest
+
+
+class TestRepoInstance(unittest.TestCase):
+    def get_repo(self, repo_dir, filenames):
+        """Create a repository with 'filenames' committed"""
+        repo = Repo.init(repo_dir)
+        with repo.config_writer() as config:
+            config.set_value('user', 'name', 'superflore')
+            config.set_value('user', 'email', 'superflore@example.com')
+        for filename in filenames:
+            open(os.path.join(repo_dir, filename), 'w').close()
+        repo.index.add(filenames)
+        repo.index.commit('initial commit')
+        return RepoInstance('owner', 'repo', repo_dir, False)
+
+    def tracked(self, repo):
+        return sorted(repo.git.ls_files().split())
+
+    def test_remove_files(self):
+        """Test removing files in batches"""
+        with TempfileManager(None) as repo_dir:
+            filenames = ['a', 'b', 'c', 'd', 'e']
+            repo = self.get_repo(repo_dir, filenames)
+            repo.remove_files(
+                [os.path.join(repo_dir, f) for f in filenames[:4]],
+                batch_size=3
+            )
+            self.assertEqual(self.tracked(repo), ['e'])
+            self.assertFalse(os.path.exists(os.path.join(repo_dir, 'a')))
+            # nothing to remove
+            repo.remove_files([])
+            self.assertEqual(self.tracked(repo), ['e'])
+
+    def test_remove_files_untracked(self):
+        """Test a batch with an untracked file falls back to each file"""
+        with TempfileManager(None) as repo_dir:
+            repo = self.get_repo(repo_dir, ['a', 'b'])
+            open(os.path.join(repo_dir, 'untracked'), 'w').close()
+            repo.remove_files([
+                os.path.join(repo_dir, f) for f in ['a', 'untracked', 'b']
+            ])
+            self.assertEqual(self.tracked(repo), [])
+            self.assertTrue(
+                os.path.exists(os.path.join(repo_dir, 'untracked'))
+            )
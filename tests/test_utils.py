@@ -30,6 +30,8 @@ from superflore.utils import get_pr_text
 from superflore.utils import get_superflore_version
 from superflore.utils import make_dir
 from superflore.utils import rand_ascii_str
+from superflore.utils import remove_prefix
+from superflore.utils import remove_suffix
 from superflore.utils import resolve_dep
 from superflore.utils import retry_on_exception
 from superflore.utils import sanitize_string
@@ -55,6 +57,9 @@ class TestUtils(unittest.TestCase):
         # test escaping every character
         ret = sanitize_string('aaaaeeeeoooo', 'aeo')
         self.assertEqual(ret, '\\a\\a\\a\\a\\e\\e\\e\\e\\o\\o\\o\\o')
+        # test characters that are special in regular expressions
+        ret = sanitize_string('a (b) [c] ^$\\d', '()[]^$\\')
+        self.assertEqual(ret, 'a \\(b\\) \\[c\\] \\^\\$\\\\d')
 
     def test_trim_string(self):
         """Test trim string function"""
@@ -68,6 +73,20 @@ class TestUtils(unittest.TestCase):
         ret = trim_string('abcdef', length=6)
         self.assertEqual(ret, 'a[...]')
 
+    def test_remove_prefix_suffix(self):
+        """Test prefix and suffix removal functions"""
+        # characters of the prefix must not be stripped from the name
+        ret = remove_prefix('/repo/ros-melodic/roscpp/roscpp-1.0.pkgbuild',
+                            '/repo/ros-melodic/roscpp/')
+        self.assertEqual(ret, 'roscpp-1.0.pkgbuild')
+        # characters of the suffix must not be stripped from the version
+        ret = remove_suffix('1.0.0b.ebuild', '.ebuild')
+        self.assertEqual(ret, '1.0.0b')
+        # strings without the prefix or suffix are unchanged
+        self.assertEqual(remove_prefix('abc', 'x'), 'abc')
+        self.assertEqual(remove_suffix('abc', 'x'), 'abc')
+        self.assertEqual(remove_suffix('abc', ''), 'abc')
+
     def test_mkdir(self):
         """Tests the make directory function"""
         with TempfileManager(None) as temp_dir: